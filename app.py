@@ -1,15 +1,25 @@
 """AutoGreet - Streamlit UI."""
 from __future__ import annotations
 
+import hashlib
+import io
 import json
 import logging
+import os
 import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from pathlib import Path
 
 import streamlit as st
 from PIL import Image
 
+try:  # optional speed-up — parses JSON several times faster than stdlib
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 CONFIG_PATH = Path("template_config.json")
@@ -60,15 +70,25 @@ DEFAULT_CONFIG: dict = {
 }
 
 
+@st.cache_resource(show_spinner=False)
+def _load_config_cached(mtime_ns: int) -> dict:
+    """Parse the config file once per on-disk version.
+
+    Keyed on st_mtime_ns so every Streamlit rerun gets the same dict back
+    without re-reading or re-parsing until the file actually changes.
+    """
+    raw = CONFIG_PATH.read_bytes()
+    cfg = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    for k, v in DEFAULT_CONFIG.items():
+        if k not in cfg:
+            cfg[k] = v
+    return cfg
+
+
 def load_config() -> dict:
     if CONFIG_PATH.exists():
         try:
-            with CONFIG_PATH.open() as f:
-                cfg = json.load(f)
-            for k, v in DEFAULT_CONFIG.items():
-                if k not in cfg:
-                    cfg[k] = v
-            return cfg
+            return _load_config_cached(CONFIG_PATH.stat().st_mtime_ns)
         except Exception:
             pass
     return json.loads(json.dumps(DEFAULT_CONFIG))
@@ -76,8 +96,16 @@ def load_config() -> dict:
 
 def save_config(cfg: dict) -> None:
     CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with CONFIG_PATH.open("w") as f:
-        json.dump(cfg, f, indent=2)
+    if orjson is not None:
+        data = orjson.dumps(cfg, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(cfg, indent=2).encode()
+    # Write to a sibling temp file and rename so a rerun mid-write can
+    # never leave a truncated config behind.
+    tmp = CONFIG_PATH.with_suffix(".json.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, CONFIG_PATH)
+    _load_config_cached.clear()
 
 
 def get_secrets() -> dict:
@@ -354,6 +382,17 @@ SETUP_DONE_KEYS = {
 }
 
 
+@st.cache_resource(show_spinner=False)
+def _employee_store() -> dict:
+    """Cross-rerun store for fetched employee lists.
+
+    st.session_state deep-copies values on access for safety, which is
+    wasteful for hundreds of mapped employees carrying _raw records;
+    cache_resource hands back the same dict by reference.
+    """
+    return {}
+
+
 def _init_state() -> None:
     if "page" not in st.session_state:
         st.session_state.page = "Dashboard"
@@ -457,7 +496,7 @@ def page_dashboard() -> None:
     secrets = get_secrets()
     today   = date.today()
 
-    employees: list[dict] = st.session_state.get("employees", [])
+    employees: list[dict] = _employee_store().get("employees", [])
     birthdays_today     = [e for e in employees if e.get("dob") and e["dob"].month == today.month and e["dob"].day == today.day]
     anniversaries_today = [e for e in employees if e.get("doj") and e["doj"].month == today.month and e["doj"].day == today.day]
 
@@ -496,12 +535,9 @@ def page_dashboard() -> None:
                     if cfg["data_source"].get("sample_url"):
                         with st.spinner("Fetching..."):
                             try:
-                                from data_sources import get_employees, map_employee, invalidate_cache
+                                from data_sources import get_mapped_employees, invalidate_cache
                                 invalidate_cache()
-                                raws = get_employees(cfg, secrets)
-                                st.session_state["employees"] = [
-                                    map_employee(r, cfg.get("field_mapping", {})) for r in raws
-                                ]
+                                _employee_store()["employees"] = get_mapped_employees(cfg, secrets)
                                 st.rerun()
                             except Exception as exc:
                                 st.error(f"Could not fetch: {exc}")
@@ -772,6 +808,20 @@ def page_field_mapping() -> None:
 # Page: Templates & fonts
 # ---------------------------------------------------------------------------
 
+@st.cache_data(show_spinner=False)
+def _template_thumb(path_str: str, mtime_ns: int, max_side: int = 512) -> bytes:
+    """Small PNG preview of a template, cached per on-disk version.
+
+    Keeps reruns from re-reading and shipping the full-resolution
+    template to the browser; mtime_ns invalidates after re-upload.
+    """
+    img = Image.open(path_str)
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, "PNG", optimize=False, compress_level=1)
+    return buf.getvalue()
+
+
 def page_templates_fonts() -> None:
     _page_header("Templates & Fonts", "Upload poster backgrounds and configure typography.")
     cfg = st.session_state.cfg
@@ -787,7 +837,10 @@ def page_templates_fonts() -> None:
                 st.markdown("**Template image**")
                 current = cfg[pt].get("template", f"assets/templates/{pt}.png")
                 if Path(current).exists():
-                    st.image(current, use_container_width=True)
+                    st.image(
+                        _template_thumb(current, Path(current).stat().st_mtime_ns),
+                        use_container_width=True,
+                    )
                 else:
                     st.markdown(
                         '<div style="background:#f8fafc;border:2px dashed #e2e8f0;border-radius:12px;'
@@ -797,7 +850,13 @@ def page_templates_fonts() -> None:
                 up = st.file_uploader(f"Upload {pt} template", type=["png", "jpg", "jpeg"], key=f"tmpl_{pt}")
                 if up:
                     dest = template_dir / f"{pt}.png"
-                    Image.open(up).save(str(dest), format="PNG")
+                    if up.name.lower().endswith(".png"):
+                        # Already a PNG — write the bytes as-is instead of
+                        # paying a full decode + re-encode.
+                        dest.write_bytes(bytes(up.getbuffer()))
+                    else:
+                        Image.open(up).save(str(dest), format="PNG",
+                                            optimize=False, compress_level=1)
                     cfg[pt]["template"] = str(dest)
                     st.success("Template saved.")
                     st.rerun()
@@ -860,7 +919,8 @@ def page_templates_fonts() -> None:
                 up = st.file_uploader(f"Upload {label}", type=["ttf", "otf"], key=f"font_{slot}")
                 if up:
                     dest = font_dir / up.name
-                    dest.write_bytes(up.read())
+                    with dest.open("wb") as fh:
+                        shutil.copyfileobj(up, fh, length=65536)
                     fonts[slot] = str(dest)
                     st.success(f"Saved {up.name}")
         cfg["fonts"] = fonts
@@ -947,10 +1007,36 @@ def page_recipients() -> None:
 # Page: Preview & Send
 # ---------------------------------------------------------------------------
 
-def page_preview_send() -> None:
-    from data_sources import get_employees, map_employee
+def _poster_cache_key(emp: dict) -> str:
+    """Stable content hash for an employee dict (dates stringified)."""
+    payload = json.dumps(emp, default=str, sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _render_poster_cached(etype: str, emp_key: str, date_iso: str,
+                          _emp: dict, _cfg: dict, _secrets: dict) -> bytes:
+    """Render one poster to PNG bytes, cached on (type, employee hash, date).
+
+    emp_key/date_iso form the cache key; the underscore-prefixed args carry
+    the actual data without being hashed by Streamlit.
+    """
     from poster_engine import generate_birthday_poster, generate_anniversary_poster, poster_to_bytes
-    from mailer import send_birthday_emails, send_anniversary_emails, _names_summary
+    fn = generate_birthday_poster if etype == "birthday" else generate_anniversary_poster
+    return poster_to_bytes(fn(_emp, _cfg, _secrets, date.fromisoformat(date_iso)))
+
+
+def page_preview_send() -> None:
+    from data_sources import get_mapped_employees
+    from image_tools import prefetch_photos
+    from poster_engine import (
+        generate_birthday_poster,
+        generate_anniversary_poster,
+        poster_to_bytes,
+        PosterBlob,
+        POSTER_EXT,
+    )
+    from mailer import send_daily_greetings, _names_summary
 
     cfg     = st.session_state.cfg
     secrets = get_secrets()
@@ -977,22 +1063,23 @@ def page_preview_send() -> None:
     with ctrl3:
         st.markdown("<div style='padding-top:25px;'>", unsafe_allow_html=True)
         if st.button("Clear", use_container_width=True):
-            st.session_state.pop("send_employees", None)
+            _employee_store().pop("send_employees", None)
+            _render_poster_cached.clear()
             st.rerun()
         st.markdown("</div>", unsafe_allow_html=True)
 
     if load_clicked:
         with st.spinner("Fetching employees..."):
             try:
-                raws   = get_employees(cfg, secrets)
-                mapped = [map_employee(r, cfg.get("field_mapping", {})) for r in raws]
-                st.session_state["send_employees"] = mapped
-                st.session_state["employees"]      = mapped
+                mapped = get_mapped_employees(cfg, secrets)
+                store = _employee_store()
+                store["send_employees"] = mapped
+                store["employees"]      = mapped
             except Exception as exc:
                 st.error(f"Failed to fetch employees: {exc}")
                 return
 
-    employees: list[dict] = st.session_state.get("send_employees", [])
+    employees: list[dict] = _employee_store().get("send_employees", [])
     if not employees:
         st.markdown(
             '<div class="ag-empty" style="padding:40px 0;">'
@@ -1003,8 +1090,14 @@ def page_preview_send() -> None:
         )
         return
 
-    birthdays     = [e for e in employees if e.get("dob") and e["dob"].month == chosen_date.month and e["dob"].day == chosen_date.day]
-    anniversaries = [e for e in employees if e.get("doj") and e["doj"].month == chosen_date.month and e["doj"].day == chosen_date.day]
+    birthdays: list[dict] = []
+    anniversaries: list[dict] = []
+    for emp in employees:  # single pass instead of one scan per event type
+        dob, doj = emp.get("dob"), emp.get("doj")
+        if dob and dob.month == chosen_date.month and dob.day == chosen_date.day:
+            birthdays.append(emp)
+        if doj and doj.month == chosen_date.month and doj.day == chosen_date.day:
+            anniversaries.append(emp)
     new_bd        = [e for e in birthdays     if not already_sent(e["name"], "birthday",    chosen_date)]
     new_ann       = [e for e in anniversaries if not already_sent(e["name"], "anniversary", chosen_date)]
     skip_bd       = [e for e in birthdays     if     already_sent(e["name"], "birthday",    chosen_date)]
@@ -1072,13 +1165,15 @@ def page_preview_send() -> None:
                     if st.button("Generate", key=f"{key_pfx}_gen_{i}"):
                         with st.spinner("Rendering..."):
                             try:
-                                fn  = generate_birthday_poster if etype == "Birthday" else generate_anniversary_poster
-                                png = poster_to_bytes(fn(emp, cfg, secrets, chosen_date))
-                                st.image(png, use_container_width=True)
+                                poster = _render_poster_cached(
+                                    etype.lower(), _poster_cache_key(emp),
+                                    chosen_date.isoformat(), emp, cfg, secrets,
+                                )
+                                st.image(poster, use_container_width=True)
                                 st.download_button(
-                                    "Download PNG", data=png,
-                                    file_name=f"{etype.lower()}_{emp['name'].replace(' ', '_')}.png",
-                                    mime="image/png", key=f"{key_pfx}_dl_{i}",
+                                    "Download poster", data=poster,
+                                    file_name=f"{etype.lower()}_{emp['name'].replace(' ', '_')}{POSTER_EXT}",
+                                    mime="image/jpeg", key=f"{key_pfx}_dl_{i}",
                                     use_container_width=True,
                                 )
                             except Exception as exc:
@@ -1128,58 +1223,78 @@ def page_preview_send() -> None:
         return
 
     # ── Execute send ──
-    bd_posters:  list[tuple[str, bytes]] = []
+    bd_posters:  list[PosterBlob] = []
     bd_names:    list[str] = []
-    ann_posters: list[tuple[str, bytes]] = []
+    ann_posters: list[PosterBlob] = []
     ann_names:   list[str] = []
 
     with st.status("Generating posters...", expanded=True) as status_box:
-        for emp in new_bd:
-            st.write(f"Birthday poster — {emp['name']}")
-            try:
-                png = poster_to_bytes(generate_birthday_poster(emp, cfg, secrets, chosen_date))
-                bd_posters.append((f"birthday_{emp['name'].replace(' ', '_')}.png", png))
-                bd_names.append(emp["name"])
-            except Exception as exc:
-                st.warning(f"Birthday poster failed for {emp['name']}: {exc}")
-
-        for emp in new_ann:
-            st.write(f"Anniversary poster — {emp['name']}")
-            try:
-                png = poster_to_bytes(generate_anniversary_poster(emp, cfg, secrets, chosen_date))
-                ann_posters.append((f"anniversary_{emp['name'].replace(' ', '_')}.png", png))
-                ann_names.append(emp["name"])
-            except Exception as exc:
-                st.warning(f"Anniversary poster failed for {emp['name']}: {exc}")
+        # Generation is independent per poster (photo fetch + Pillow C work
+        # both release the GIL), so render in threads and keep every st.*
+        # call on the main thread.
+        jobs = [("birthday", emp, generate_birthday_poster) for emp in new_bd]
+        jobs += [("anniversary", emp, generate_anniversary_poster) for emp in new_ann]
+
+        # Overlap all photo downloads up front; each render then starts from
+        # in-memory bytes instead of its own sequential GET.
+        photos = prefetch_photos([emp.get("photo_url", "") for _, emp, _ in jobs])
+
+        def _render(job):
+            etype, emp, generate = job
+            return poster_to_bytes(generate(
+                emp, cfg, secrets, chosen_date,
+                photo_bytes=photos.get(emp.get("photo_url", "")),
+            ))
+
+        if len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as pool:
+                futures = [pool.submit(_render, job) for job in jobs]
+                rendered = []
+                for fut in futures:
+                    try:
+                        rendered.append(fut.result())
+                    except Exception as exc:
+                        rendered.append(exc)
+        else:
+            rendered = []
+            for job in jobs:
+                try:
+                    rendered.append(_render(job))
+                except Exception as exc:
+                    rendered.append(exc)
+
+        for (etype, emp, _), result in zip(jobs, rendered):
+            label = "Birthday" if etype == "birthday" else "Anniversary"
+            st.write(f"{label} poster — {emp['name']}")
+            if isinstance(result, Exception):
+                st.warning(f"{label} poster failed for {emp['name']}: {result}")
+                continue
+            posters, names = (bd_posters, bd_names) if etype == "birthday" else (ann_posters, ann_names)
+            posters.append(PosterBlob(f"{etype}_{emp['name'].replace(' ', '_')}{POSTER_EXT}", result))
+            names.append(emp["name"])
 
         status_box.update(label="Sending emails...", state="running")
         results: list[tuple[bool, str]] = []
 
-        if bd_posters:
-            try:
-                send_birthday_emails(
-                    bd_posters, cfg["recipients"]["birthday"],
-                    smtp_sender, smtp_password, chosen_date,
-                    employee_names=bd_names,
-                )
-                for n in bd_names:
-                    mark_sent(n, "birthday", chosen_date)
-                results.append((True, f"Birthday email sent ({len(bd_posters)} poster(s)) — {', '.join(bd_names)}"))
-            except Exception as exc:
-                results.append((False, f"Birthday email failed: {exc}"))
-
-        if ann_posters:
-            try:
-                send_anniversary_emails(
-                    ann_posters, cfg["recipients"]["anniversary"],
-                    smtp_sender, smtp_password, chosen_date,
-                    employee_names=ann_names,
-                )
-                for n in ann_names:
-                    mark_sent(n, "anniversary", chosen_date)
-                results.append((True, f"Anniversary email sent ({len(ann_posters)} poster(s)) — {', '.join(ann_names)}"))
-            except Exception as exc:
-                results.append((False, f"Anniversary email failed: {exc}"))
+        # One combined email when recipients overlap; otherwise both batches
+        # reuse a single SMTP connection.
+        send_results = send_daily_greetings(
+            bd_posters, ann_posters, cfg["recipients"],
+            smtp_sender, smtp_password, chosen_date,
+            birthday_names=bd_names, anniversary_names=ann_names,
+        )
+        batch_info = {
+            "birthday": (bd_posters, bd_names, "Birthday"),
+            "anniversary": (ann_posters, ann_names, "Anniversary"),
+        }
+        for event_type, error in send_results:
+            posters, names, label = batch_info[event_type]
+            if error is None:
+                for n in names:
+                    mark_sent(n, event_type, chosen_date)
+                results.append((True, f"{label} email sent ({len(posters)} poster(s)) — {', '.join(names)}"))
+            else:
+                results.append((False, f"{label} email failed: {error}"))
 
         all_ok = all(ok for ok, _ in results)
         status_box.update(
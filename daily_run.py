@@ -15,10 +15,17 @@ import argparse
 import json
 import logging
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from pathlib import Path
 
+try:  # optional speed-up — parses JSON several times faster than stdlib
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)-8s %(message)s",
@@ -73,6 +80,10 @@ def _dates_to_check(today: date) -> list[date]:
 # Secrets loader
 # ---------------------------------------------------------------------------
 
+# Fallback parser for simple `key = "value"` lines when no TOML lib is available.
+_TOML_KV_RE = re.compile(rb'^[ \t]*(\w+)[ \t]*=[ \t]*"([^"]*)"', re.MULTILINE)
+
+
 def _load_secrets() -> dict:
     secrets_path = Path(".streamlit/secrets.toml")
     if not secrets_path.exists():
@@ -84,20 +95,73 @@ def _load_secrets() -> dict:
         try:
             import tomli as tomllib  # type: ignore[no-redef]
         except ImportError:
-            import re
-            secrets: dict = {}
-            for line in secrets_path.read_text().splitlines():
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                m = re.match(r'^(\w+)\s*=\s*"([^"]*)"', line)
-                if m:
-                    secrets[m.group(1)] = m.group(2)
-            return secrets
+            return {
+                m.group(1).decode(): m.group(2).decode()
+                for m in _TOML_KV_RE.finditer(secrets_path.read_bytes())
+            }
     with secrets_path.open("rb") as f:
         return tomllib.load(f)
 
 
+# ---------------------------------------------------------------------------
+# Raw-record prefilter
+# ---------------------------------------------------------------------------
+
+def _quick_date_match(value, d: date) -> bool:
+    """Cheap string test: could this raw date string fall on d's month/day?
+
+    Checks day-first, month-first and ISO shapes (padded and unpadded)
+    against every format data_sources.parse_date accepts. Deliberately
+    over-inclusive — false positives are dropped later by the real date
+    parse, but a false negative would silently skip an employee.
+    """
+    s = str(value).strip()
+    if not s:
+        return False
+    for day in {f"{d.day:02d}", str(d.day)}:
+        for mon in {f"{d.month:02d}", str(d.month)}:
+            if (s.startswith(f"{day}-{mon}-") or s.startswith(f"{day}/{mon}/")
+                    or s.startswith(f"{mon}/{day}/")
+                    or s.endswith(f"-{mon}-{day}") or s.endswith(f"/{mon}/{day}")):
+                return True
+    return False
+
+
+def _filter_raw_candidates(raws: list[dict], field_mapping: dict, dates: list[date]) -> list[dict]:
+    """Keep only raw records whose dob/doj strings could match one of *dates*.
+
+    Runs before map_employees_bulk so the full mapping + date parsing only
+    happens for the handful of records that might celebrate today.
+    """
+    dob_key = field_mapping.get("dob", "DateOfBirth")
+    doj_key = field_mapping.get("doj", "DateOfJoining")
+    return [
+        r for r in raws
+        if any(
+            _quick_date_match(r.get(dob_key, ""), d) or _quick_date_match(r.get(doj_key, ""), d)
+            for d in dates
+        )
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Event index
+# ---------------------------------------------------------------------------
+
+def _build_event_index(
+    employees: list[dict],
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """Precompute (month, day) pairs for each employee's dob and doj.
+
+    Matching a target date then compares small int tuples instead of
+    re-touching every full employee dict per date — which matters on
+    Mondays when three dates are processed.
+    """
+    dob_md = [(e["dob"].month, e["dob"].day) if e.get("dob") else (0, 0) for e in employees]
+    doj_md = [(e["doj"].month, e["doj"].day) if e.get("doj") else (0, 0) for e in employees]
+    return dob_md, doj_md
+
+
 # ---------------------------------------------------------------------------
 # Per-employee poster generation (shared between CLI and UI)
 # ---------------------------------------------------------------------------
@@ -107,17 +171,25 @@ def process_employee_for_date(
     target_date: date,
     cfg: dict,
     secrets: dict,
+    photo_bytes: bytes | None = None,
 ) -> tuple[list[tuple[str, bytes]], list[str], list[tuple[str, bytes]], list[str]]:
     """Generate posters for one employee on one target date.
 
     Returns (birthday_posters, birthday_names, anniversary_posters, anniversary_names).
+    photo_bytes carries a prefetched photo so generation skips the download.
     Does NOT send emails — caller batches and sends after iterating all employees.
     """
-    from poster_engine import generate_birthday_poster, generate_anniversary_poster, poster_to_bytes
-
-    birthday_posters: list[tuple[str, bytes]] = []
+    from poster_engine import (
+        generate_birthday_poster,
+        generate_anniversary_poster,
+        poster_to_bytes,
+        PosterBlob,
+        POSTER_EXT,
+    )
+
+    birthday_posters: list[PosterBlob] = []
     birthday_names: list[str] = []
-    anniversary_posters: list[tuple[str, bytes]] = []
+    anniversary_posters: list[PosterBlob] = []
     anniversary_names: list[str] = []
 
     name = emp.get("name") or "unknown"
@@ -130,12 +202,13 @@ def process_employee_for_date(
             logger.info("[birthday] Skipping %s — already sent for %s", name, target_date)
         else:
             try:
-                img = generate_birthday_poster(emp, cfg, secrets, target_date)
+                img = generate_birthday_poster(emp, cfg, secrets, target_date,
+                                               photo_bytes=photo_bytes)
                 img_bytes = poster_to_bytes(img)
-                filename = f"birthday_{safe_name}_{target_date.isoformat()}.png"
+                filename = f"birthday_{safe_name}_{target_date.isoformat()}{POSTER_EXT}"
                 out_path = Path("storage/output") / filename
                 out_path.write_bytes(img_bytes)
-                birthday_posters.append((filename, img_bytes))
+                birthday_posters.append(PosterBlob(filename, img_bytes))
                 birthday_names.append(name)
                 logger.info("[birthday] Generated poster for %s (date: %s)", name, target_date)
             except Exception as exc:
@@ -148,12 +221,13 @@ def process_employee_for_date(
             logger.info("[anniversary] Skipping %s — already sent for %s", name, target_date)
         else:
             try:
-                img = generate_anniversary_poster(emp, cfg, secrets, target_date)
+                img = generate_anniversary_poster(emp, cfg, secrets, target_date,
+                                                  photo_bytes=photo_bytes)
                 img_bytes = poster_to_bytes(img)
-                filename = f"anniversary_{safe_name}_{target_date.isoformat()}.png"
+                filename = f"anniversary_{safe_name}_{target_date.isoformat()}{POSTER_EXT}"
                 out_path = Path("storage/output") / filename
                 out_path.write_bytes(img_bytes)
-                anniversary_posters.append((filename, img_bytes))
+                anniversary_posters.append(PosterBlob(filename, img_bytes))
                 anniversary_names.append(name)
                 logger.info("[anniversary] Generated poster for %s (date: %s)", name, target_date)
             except Exception as exc:
@@ -180,20 +254,15 @@ def main() -> None:
     logger.info("=== AutoGreet daily run — %s%s ===", today.isoformat(),
                 " [DRY RUN]" if args.dry_run else "")
 
-    with open("template_config.json") as f:
-        cfg = json.load(f)
+    cfg_bytes = Path("template_config.json").read_bytes()
+    cfg = orjson.loads(cfg_bytes) if orjson is not None else json.loads(cfg_bytes)
 
     secrets = _load_secrets()
 
-    from data_sources import get_employees, map_employee
-    from mailer import send_birthday_emails, send_anniversary_emails
-
-    logger.info("Fetching employees...")
-    raw_employees = get_employees(cfg, secrets)
-    employees = [map_employee(r, cfg.get("field_mapping", {})) for r in raw_employees]
-    logger.info("Loaded %d employee(s)", len(employees))
-
-    os.makedirs("storage/output", exist_ok=True)
+    from data_sources import get_employees, map_employees_bulk
+    from image_tools import prefetch_photos
+    from mailer import send_daily_greetings
+    from poster_engine import PosterBlob
 
     dates_to_process = _dates_to_check(today)
     if len(dates_to_process) > 1:
@@ -202,6 +271,20 @@ def main() -> None:
             [d.isoformat() for d in dates_to_process],
         )
 
+    logger.info("Fetching employees...")
+    raw_employees = get_employees(cfg, secrets)
+
+    # Cheap string prefilter so the full mapping + date parsing only runs
+    # on records that could possibly celebrate on a processed date.
+    candidates = _filter_raw_candidates(
+        raw_employees, cfg.get("field_mapping", {}), dates_to_process,
+    )
+    employees = map_employees_bulk(candidates, cfg.get("field_mapping", {}))
+    logger.info("Loaded %d employee(s), %d candidate(s) for %d date(s)",
+                len(raw_employees), len(employees), len(dates_to_process))
+
+    os.makedirs("storage/output", exist_ok=True)
+
     smtp_sender = secrets.get("smtp_sender", "")
     smtp_password = secrets.get("smtp_password", "")
 
@@ -209,14 +292,41 @@ def main() -> None:
         logger.error("SMTP credentials missing — set smtp_sender and smtp_password in secrets.toml")
         sys.exit(1)
 
+    dob_md, doj_md = _build_event_index(employees)
+
     for target_date in dates_to_process:
-        birthday_posters: list[tuple[str, bytes]] = []
+        birthday_posters: list[PosterBlob] = []
         birthday_names: list[str] = []
-        anniversary_posters: list[tuple[str, bytes]] = []
+        anniversary_posters: list[PosterBlob] = []
         anniversary_names: list[str] = []
 
-        for emp in employees:
-            bp, bn, ap, an = process_employee_for_date(emp, target_date, cfg, secrets)
+        md = (target_date.month, target_date.day)
+        matched = [
+            employees[i]
+            for i in range(len(employees))
+            if dob_md[i] == md or doj_md[i] == md
+        ]
+
+        # Overlap all the day's photo downloads up front, then hand the
+        # prefetched bytes to the per-employee pipeline.
+        photos = prefetch_photos([e.get("photo_url", "") for e in matched])
+
+        def _process(emp: dict):
+            return process_employee_for_date(
+                emp, target_date, cfg, secrets,
+                photo_bytes=photos.get(emp.get("photo_url", "")),
+            )
+
+        # Each employee's remaining pipeline (background removal, Pillow
+        # compose) is independent; threads overlap the network latency and
+        # Pillow's C code releases the GIL.
+        if len(matched) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(matched))) as pool:
+                results = list(pool.map(_process, matched))
+        else:
+            results = [_process(e) for e in matched]
+
+        for bp, bn, ap, an in results:
             birthday_posters.extend(bp)
             birthday_names.extend(bn)
             anniversary_posters.extend(ap)
@@ -230,33 +340,26 @@ def main() -> None:
         if args.dry_run:
             continue
 
-        try:
-            send_birthday_emails(
-                birthday_posters,
-                cfg.get("recipients", {}).get("birthday", {}),
-                smtp_sender,
-                smtp_password,
-                target_date,
-                employee_names=birthday_names,
-            )
-            for name in birthday_names:
-                _mark_sent(name, "birthday", target_date)
-        except Exception as exc:
-            logger.error("Birthday email send failed for %s: %s", target_date, exc)
-
-        try:
-            send_anniversary_emails(
-                anniversary_posters,
-                cfg.get("recipients", {}).get("anniversary", {}),
-                smtp_sender,
-                smtp_password,
-                target_date,
-                employee_names=anniversary_names,
-            )
-            for name in anniversary_names:
-                _mark_sent(name, "anniversary", target_date)
-        except Exception as exc:
-            logger.error("Anniversary email send failed for %s: %s", target_date, exc)
+        # One combined email when recipients overlap; otherwise both batches
+        # still share a single SMTP connection.
+        send_results = send_daily_greetings(
+            birthday_posters,
+            anniversary_posters,
+            cfg.get("recipients", {}),
+            smtp_sender,
+            smtp_password,
+            target_date,
+            birthday_names=birthday_names,
+            anniversary_names=anniversary_names,
+        )
+        names_by_event = {"birthday": birthday_names, "anniversary": anniversary_names}
+        for event_type, error in send_results:
+            if error is None:
+                for name in names_by_event[event_type]:
+                    _mark_sent(name, event_type, target_date)
+            else:
+                logger.error("%s email send failed for %s: %s",
+                             event_type.capitalize(), target_date, error)
 
     if args.dry_run:
         logger.info("Dry run — email sending skipped.")
@@ -9,6 +9,27 @@ from pathlib import Path
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
+
+try:  # optional speed-up — parses JSON several times faster than stdlib
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:  # optional speed-up — vectorised date parsing for large rosters
+    import pandas as pd
+except ImportError:  # pragma: no cover
+    pd = None
+
+try:  # Streamlit is optional here — daily_run.py uses this module from the CLI
+    import streamlit as _st
+    _cache_data = _st.cache_data
+except ImportError:  # pragma: no cover - exercised only without streamlit installed
+    def _cache_data(*_args, **_kwargs):
+        def _wrap(fn):
+            fn.clear = lambda: None
+            return fn
+        return _wrap
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +39,14 @@ DATE_FORMATS = ("%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%Y/%m/%d")
 _cache: dict[str, tuple[float, list[dict]]] = {}
 CACHE_TTL_SECONDS = 3600  # 1 hour
 
+# Shared session so repeated fetches reuse pooled TCP/TLS connections
+# instead of paying a fresh handshake per request.
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                       max_retries=Retry(total=3, backoff_factor=0.3))
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
 
 def parse_date(date_str: str) -> date | None:
     """Parse a date string in multiple formats; return None on failure."""
@@ -43,9 +72,9 @@ def fetch_sample_json(url: str, auth_header: dict | None = None) -> list[dict[st
             return cached_data
 
     headers = dict(auth_header) if auth_header else {}
-    resp = requests.get(url, headers=headers, timeout=15)
+    resp = _SESSION.get(url, headers=headers, timeout=15)
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content) if orjson is not None else resp.json()
 
     if isinstance(data, dict):
         result = [data]
@@ -62,6 +91,7 @@ def fetch_sample_json(url: str, auth_header: dict | None = None) -> list[dict[st
 def invalidate_cache() -> None:
     """Clear the in-process employee cache."""
     _cache.clear()
+    _mapped_employees.clear()
 
 
 def fetch_zinghr(config: dict) -> list[dict[str, Any]]:
@@ -107,8 +137,8 @@ def get_employees(cfg: dict, secrets: dict | None = None) -> list[dict[str, Any]
     raise ValueError(f"Unknown data source mode: {mode!r}")
 
 
-def map_employee(raw: dict, field_mapping: dict) -> dict:
-    """Normalise a raw employee record using field_mapping."""
+def _map_strings(raw: dict, field_mapping: dict) -> dict:
+    """Map the string fields of one record; dates stay as raw strings."""
     def _str(key: str, default: str) -> str:
         val = raw.get(field_mapping.get(key, default))
         return val if isinstance(val, str) else (str(val) if val is not None else "")
@@ -119,8 +149,78 @@ def map_employee(raw: dict, field_mapping: dict) -> dict:
         "vertical": _str("vertical", "Vertical"),
         "department": _str("department", "Department"),
         "location": _str("location", "Location"),
-        "dob": parse_date(_str("dob", "DateOfBirth")),
-        "doj": parse_date(_str("doj", "DateOfJoining")),
+        "dob": _str("dob", "DateOfBirth"),
+        "doj": _str("doj", "DateOfJoining"),
         "photo_url": _str("photo_url", "EmployeeImage"),
         "_raw": raw,
     }
+
+
+def map_employee(raw: dict, field_mapping: dict) -> dict:
+    """Normalise a raw employee record using field_mapping."""
+    emp = _map_strings(raw, field_mapping)
+    emp["dob"] = parse_date(emp["dob"])
+    emp["doj"] = parse_date(emp["doj"])
+    return emp
+
+
+def map_employees_bulk(raws: list[dict], field_mapping: dict) -> list[dict]:
+    """Normalise a whole batch of raw records.
+
+    With pandas installed, dob/doj columns are parsed with vectorised
+    to_datetime calls (one per format, in DATE_FORMATS priority order,
+    so results match parse_date exactly) instead of per-row strptime
+    attempts; without it this falls back to map_employee per record.
+    """
+    if pd is None or not raws:
+        return [map_employee(r, field_mapping) for r in raws]
+
+    employees = [_map_strings(r, field_mapping) for r in raws]
+    for field in ("dob", "doj"):
+        column = pd.Series([e[field].strip() for e in employees])
+        parsed = pd.Series(pd.NaT, index=column.index)
+        for fmt in DATE_FORMATS:
+            mask = parsed.isna() & (column != "")
+            if not mask.any():
+                break
+            parsed[mask] = pd.to_datetime(column[mask], format=fmt, errors="coerce")
+        for emp, value in zip(employees, parsed):
+            emp[field] = None if pd.isna(value) else value.date()
+    return employees
+
+
+def iter_todays(raws: list[dict], field_mapping: dict, today: date):
+    """Yield ("birthday" | "anniversary", employee) for records matching *today*.
+
+    Maps each raw record exactly once and never materialises the full
+    mapped list, so callers that only need the day's matches stay
+    O(matches) in memory. An employee with both events on the same day
+    is yielded twice, once per event type.
+    """
+    m, d = today.month, today.day
+    for raw in raws:
+        emp = map_employee(raw, field_mapping)
+        dob = emp.get("dob")
+        if dob and dob.month == m and dob.day == d:
+            yield ("birthday", emp)
+        doj = emp.get("doj")
+        if doj and doj.month == m and doj.day == d:
+            yield ("anniversary", emp)
+
+
+@_cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _mapped_employees(url: str, mapping_items: tuple, _cfg: dict, _secrets: dict | None) -> list[dict]:
+    """Fetch + map employees, cached per (url, field_mapping) in Streamlit runs.
+
+    url and mapping_items form the cache key; _cfg/_secrets are underscore-
+    prefixed so st.cache_data does not try to hash them.
+    """
+    raws = get_employees(_cfg, _secrets)
+    return map_employees_bulk(raws, dict(mapping_items))
+
+
+def get_mapped_employees(cfg: dict, secrets: dict | None = None) -> list[dict]:
+    """Return fully-mapped employees, cached so reruns skip fetch + mapping."""
+    url = cfg.get("data_source", {}).get("sample_url", "")
+    mapping_items = tuple(sorted(cfg.get("field_mapping", {}).items()))
+    return _mapped_employees(url, mapping_items, cfg, secrets)
@@ -1,15 +1,75 @@
 """Image utilities: background removal, face-aware crop, ordinal helper."""
 from __future__ import annotations
 
+import hashlib
 import io
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Literal
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from PIL import Image
 
+try:  # optional local background removal — no per-photo network round-trip
+    from rembg import remove as _rembg_remove
+except ImportError:  # pragma: no cover
+    _rembg_remove = None
+
 logger = logging.getLogger(__name__)
 
+# Shared session so batches of photo downloads reuse pooled TCP/TLS
+# connections instead of paying a fresh handshake per image.
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                       max_retries=Retry(total=3, backoff_factor=0.3))
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
+# Disk-backed caches so repeated previews/regenerations of the same employee
+# become file reads instead of network round-trips.
+BG_CACHE_DIR = Path("storage/cache/bgremove")
+PHOTO_CACHE_DIR = Path("storage/cache/photos")
+PHOTO_CACHE_TTL_SECONDS = 3600  # 1 hour
+
+
+def _cache_key(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _cache_read(cache_dir: Path, key: str, max_age: float | None = None) -> bytes | None:
+    path = cache_dir / key
+    try:
+        if not path.exists():
+            return None
+        if max_age is not None and time.time() - path.stat().st_mtime > max_age:
+            return None
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+def _cache_write(cache_dir: Path, key: str, data: bytes) -> None:
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        (cache_dir / key).write_bytes(data)
+    except OSError as exc:
+        logger.warning("Could not write cache entry %s: %s", key, exc)
+
+
+def clear_bg_cache() -> None:
+    """Delete all cached background-removal results and downloaded photos."""
+    for cache_dir in (BG_CACHE_DIR, PHOTO_CACHE_DIR):
+        if not cache_dir.exists():
+            continue
+        for entry in cache_dir.iterdir():
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
 
 def ordinal(n: int) -> str:
     """Return ordinal string for integer n (1 → '1st', 11 → '11th', etc.)."""
@@ -21,19 +81,62 @@ def ordinal(n: int) -> str:
 
 
 def fetch_image_bytes(url: str) -> bytes:
-    """Download an image from *url* and return raw bytes."""
-    resp = requests.get(url, timeout=15)
+    """Download an image from *url* and return raw bytes (disk-cached with TTL)."""
+    key = _cache_key(url.encode())
+    cached = _cache_read(PHOTO_CACHE_DIR, key, max_age=PHOTO_CACHE_TTL_SECONDS)
+    if cached is not None:
+        logger.debug("Photo cache hit for %s", url)
+        return cached
+
+    resp = _SESSION.get(url, timeout=15)
     resp.raise_for_status()
+    _cache_write(PHOTO_CACHE_DIR, key, resp.content)
     return resp.content
 
 
+def prefetch_photos(urls: list[str]) -> dict[str, bytes]:
+    """Download a batch of photo URLs concurrently.
+
+    Returns {url: bytes} for the downloads that succeeded; failures are
+    logged and simply left out so callers fall back to fetching (and
+    erroring) per employee.
+    """
+    urls = [u for u in dict.fromkeys(urls) if u]
+    if not urls:
+        return {}
+
+    results: dict[str, bytes] = {}
+    with ThreadPoolExecutor(max_workers=min(8, len(urls))) as pool:
+        for url, payload in zip(urls, pool.map(_fetch_or_none, urls)):
+            if payload is not None:
+                results[url] = payload
+    return results
+
+
+def _fetch_or_none(url: str) -> bytes | None:
+    try:
+        return fetch_image_bytes(url)
+    except Exception as exc:
+        logger.warning("Photo prefetch failed for %s: %s", url, exc)
+        return None
+
+
 def remove_background(img_bytes: bytes, api_key: str) -> Image.Image:
     """
     Remove background via withoutbg.com API.
     Returns a PIL Image with transparency (RGBA).
     Raises RuntimeError if the API call fails.
+
+    Results are cached on disk keyed by a hash of the input bytes, so
+    re-previewing the same photo never repeats the API call.
     """
-    resp = requests.post(
+    key = _cache_key(img_bytes)
+    cached = _cache_read(BG_CACHE_DIR, key)
+    if cached is not None:
+        logger.debug("Background-removal cache hit (%s)", key)
+        return Image.open(io.BytesIO(cached)).convert("RGBA")
+
+    resp = _SESSION.post(
         "https://api.withoutbg.com/v1.0/image-without-background",
         headers={"X-API-Key": api_key},
         files={"image": ("photo.jpg", img_bytes, "image/jpeg")},
@@ -43,9 +146,31 @@ def remove_background(img_bytes: bytes, api_key: str) -> Image.Image:
         raise RuntimeError(
             f"Background removal API returned {resp.status_code}: {resp.text[:200]}"
         )
+    _cache_write(BG_CACHE_DIR, key, resp.content)
     return Image.open(io.BytesIO(resp.content)).convert("RGBA")
 
 
+def remove_background_local(img_bytes: bytes) -> Image.Image:
+    """Remove background with the local rembg (U²-Net) model.
+
+    ~100-300 ms of CPU per photo instead of a SaaS round-trip. Results are
+    disk-cached like the API path, under a distinct key so the two backends
+    never serve each other's output.
+    """
+    if _rembg_remove is None:
+        raise RuntimeError("rembg is not installed — local background removal unavailable.")
+
+    key = _cache_key(b"local:" + img_bytes)
+    cached = _cache_read(BG_CACHE_DIR, key)
+    if cached is not None:
+        logger.debug("Background-removal cache hit (local, %s)", key)
+        return Image.open(io.BytesIO(cached)).convert("RGBA")
+
+    result = _rembg_remove(img_bytes)
+    _cache_write(BG_CACHE_DIR, key, result)
+    return Image.open(io.BytesIO(result)).convert("RGBA")
+
+
 def _face_crop_box(img: Image.Image, target_w: int, target_h: int) -> tuple[int, int, int, int]:
     """
     Return a (left, upper, right, lower) crop box that:
@@ -65,13 +190,27 @@ def _face_crop_box(img: Image.Image, target_w: int, target_h: int) -> tuple[int,
     return (left, top, left + target_w, top + target_h)
 
 
-def prepare_birthday_photo(img_bytes: bytes, api_key: str) -> Image.Image:
+def prepare_birthday_photo(
+    img_bytes: bytes,
+    api_key: str,
+    backend: Literal["auto", "api", "local"] = "auto",
+) -> Image.Image:
     """
     Prepare a birthday photo:
-    - remove background (best-effort; falls back to original if API unavailable)
+    - remove background (best-effort; falls back to original on failure)
     - return RGBA image, original size
+
+    backend "auto" prefers the local rembg model when installed (no network
+    latency) and falls back to the withoutbg API when an api_key is set;
+    "local"/"api" force one path.
     """
-    if api_key:
+    if backend != "api" and _rembg_remove is not None:
+        try:
+            return remove_background_local(img_bytes)
+        except Exception as exc:
+            logger.warning("Local background removal failed: %s", exc)
+
+    if backend != "local" and api_key:
         try:
             return remove_background(img_bytes, api_key)
         except Exception as exc:
@@ -87,9 +226,22 @@ def prepare_anniversary_photo(img_bytes: bytes, api_key: str, target_w: int, tar
     - cover-crop to target dimensions with face-aware top bias
     - return RGB image
     """
-    img = Image.open(io.BytesIO(img_bytes)).convert("RGB")
+    img = Image.open(io.BytesIO(img_bytes))
+    # For JPEGs, let libjpeg decode straight to a reduced scale (no-op for
+    # other formats) — much cheaper than full decode + resize.
+    img.draft("RGB", (target_w * 2, target_h * 2))
+    img = img.convert("RGB")
     src_w, src_h = img.size
+    if (src_w, src_h) == (target_w, target_h):
+        # Photo already matches the box exactly — nothing to resample or crop.
+        return img
     scale = max(target_w / src_w, target_h / src_h)
-    scaled = img.resize((round(src_w * scale), round(src_h * scale)), Image.LANCZOS)
+    if scale <= 0.5:
+        # Heavy downscale: let Pillow box-prefilter first (reducing_gap) so
+        # the expensive Lanczos pass runs over far fewer source pixels.
+        scaled = img.resize((round(src_w * scale), round(src_h * scale)),
+                            Image.LANCZOS, reducing_gap=3.0)
+    else:
+        scaled = img.resize((round(src_w * scale), round(src_h * scale)), Image.LANCZOS)
     box = _face_crop_box(scaled, target_w, target_h)
     return scaled.crop(box)
@@ -1,10 +1,13 @@
 """Email sending via SMTP (Office365)."""
 from __future__ import annotations
 
+import binascii
 import logging
 import smtplib
+import ssl
 import time
 from datetime import date
+from email import policy
 from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -12,13 +15,33 @@ from email.mime.text import MIMEText
 logger = logging.getLogger(__name__)
 
 SMTP_HOST = "smtp.office365.com"
-SMTP_PORT = 587
+SMTP_SSL_PORT = 465  # implicit TLS (SMTPS) — no STARTTLS round-trip
+
+# Built once: create_default_context() re-parses the system CA bundle on
+# every call, which is pure repeated work per reconnect.
+_TLS_CONTEXT = ssl.create_default_context()
 
 # Retry settings for transient SMTP failures
 _MAX_RETRIES = 3
 _RETRY_BASE_DELAY = 2  # seconds; doubles on each attempt
 
 
+def _encode_base64_fast(msg) -> None:
+    """Base64 content-transfer-encode *msg* via binascii's C encoder.
+
+    The stdlib default (email.encoders.encode_base64) wraps lines in a pure
+    Python loop; for multi-MB posters that is tens of thousands of
+    iterations. b2a_base64 encodes in one C call and the 76-column split is
+    a simple slice loop over the result.
+    """
+    data = msg.get_payload(decode=True)
+    b64 = binascii.b2a_base64(data, newline=False)
+    msg.set_payload(b"\n".join(
+        b64[i:i + 76] for i in range(0, len(b64), 76)
+    ).decode("ascii"))
+    msg["Content-Transfer-Encoding"] = "base64"
+
+
 def _build_message(
     sender: str,
     to: list[str],
@@ -27,7 +50,7 @@ def _build_message(
     body: str,
     attachments: list[tuple[str, bytes]],
 ) -> MIMEMultipart:
-    msg = MIMEMultipart()
+    msg = MIMEMultipart(policy=policy.SMTP)
     msg["From"] = sender
     msg["To"] = ", ".join(to)
     if cc:
@@ -35,37 +58,69 @@ def _build_message(
     msg["Subject"] = subject
     msg.attach(MIMEText(body, "plain"))
     for filename, data in attachments:
-        part = MIMEApplication(data, Name=filename)
+        part = MIMEApplication(data, Name=filename, _encoder=_encode_base64_fast)
         part["Content-Disposition"] = f'attachment; filename="{filename}"'
         msg.attach(part)
     return msg
 
 
-def send_email(
-    sender: str,
-    password: str,
-    to: list[str],
-    cc: list[str],
-    subject: str,
-    body: str,
-    attachments: list[tuple[str, bytes]],
-) -> None:
-    """Send an email with optional attachments via Office365 SMTP.
+class SMTPSession:
+    """A reusable, context-managed SMTP connection.
 
-    Retries up to _MAX_RETRIES times with exponential backoff on transient
-    SMTP errors. Raises the last exception if all attempts fail.
+    The TLS handshake and AUTH are paid once and every subsequent
+    send() reuses the live connection; a NOOP health check transparently
+    reconnects if the server dropped it. Connection setup is lazy so
+    connect failures surface inside the caller's retry loop.
     """
-    recipients = to + cc
-    msg = _build_message(sender, to, cc, subject, body, attachments)
-    last_exc: Exception | None = None
 
+    def __init__(self, sender: str, password: str):
+        self.sender = sender
+        self.password = password
+        self.server: smtplib.SMTP | None = None
+
+    def __enter__(self) -> "SMTPSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _connect(self) -> None:
+        server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_SSL_PORT, context=_TLS_CONTEXT)
+        server.login(self.sender, self.password)
+        self.server = server
+
+    def _alive(self) -> bool:
+        try:
+            return self.server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+    def send(self, msg: MIMEMultipart, recipients: list[str]) -> None:
+        if self.server is None:
+            self._connect()
+        elif not self._alive():
+            self.close()
+            self._connect()
+        # send_message serialises with BytesGenerator straight to the socket,
+        # avoiding the full as_string() str materialisation of the MIME tree
+        # (base64 posters would otherwise be duplicated as str and bytes).
+        self.server.send_message(msg, from_addr=self.sender, to_addrs=recipients)
+
+
+def _send_with_retry(session: SMTPSession, msg: MIMEMultipart,
+                     recipients: list[str], subject: str) -> None:
+    last_exc: Exception | None = None
     for attempt in range(1, _MAX_RETRIES + 1):
         try:
-            with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-                server.ehlo()
-                server.starttls()
-                server.login(sender, password)
-                server.sendmail(sender, recipients, msg.as_string())
+            session.send(msg, recipients)
             logger.info("Email sent — subject: %r, recipients: %d", subject, len(recipients))
             return
         except smtplib.SMTPException as exc:
@@ -83,6 +138,31 @@ def send_email(
     raise last_exc  # type: ignore[misc]
 
 
+def send_email(
+    sender: str,
+    password: str,
+    to: list[str],
+    cc: list[str],
+    subject: str,
+    body: str,
+    attachments: list[tuple[str, bytes]],
+    session: SMTPSession | None = None,
+) -> None:
+    """Send an email with optional attachments via Office365 SMTP.
+
+    Retries up to _MAX_RETRIES times with exponential backoff on transient
+    SMTP errors. Raises the last exception if all attempts fail. Pass an
+    open SMTPSession to reuse one connection across several sends.
+    """
+    recipients = to + cc
+    msg = _build_message(sender, to, cc, subject, body, attachments)
+    if session is not None:
+        _send_with_retry(session, msg, recipients, subject)
+    else:
+        with SMTPSession(sender, password) as own_session:
+            _send_with_retry(own_session, msg, recipients, subject)
+
+
 def _names_summary(names: list[str]) -> str:
     """'Alice', 'Alice & Bob', 'Alice, Bob & 3 others'."""
     if not names:
@@ -101,6 +181,7 @@ def send_birthday_emails(
     password: str,
     today: date | None = None,
     employee_names: list[str] | None = None,
+    session: SMTPSession | None = None,
 ) -> None:
     """Send birthday poster email — personalised subject with employee names."""
     if not posters:
@@ -126,7 +207,7 @@ def send_birthday_emails(
         body += "Celebrating today:\n" + "\n".join(f"  • {n}" for n in names) + "\n\n"
     body += "Warm regards,\nAutoGreet"
 
-    send_email(sender, password, to, cc, subject, body, posters)
+    send_email(sender, password, to, cc, subject, body, posters, session=session)
 
 
 def send_anniversary_emails(
@@ -136,6 +217,7 @@ def send_anniversary_emails(
     password: str,
     today: date | None = None,
     employee_names: list[str] | None = None,
+    session: SMTPSession | None = None,
 ) -> None:
     """Send anniversary poster email — personalised subject with employee names."""
     if not posters:
@@ -161,4 +243,99 @@ def send_anniversary_emails(
         body += "Celebrating today:\n" + "\n".join(f"  • {n}" for n in names) + "\n\n"
     body += "Warm regards,\nAutoGreet"
 
-    send_email(sender, password, to, cc, subject, body, posters)
+    send_email(sender, password, to, cc, subject, body, posters, session=session)
+
+
+def send_daily_greetings(
+    birthday_posters: list[tuple[str, bytes]],
+    anniversary_posters: list[tuple[str, bytes]],
+    recipients: dict,
+    sender: str,
+    password: str,
+    today: date | None = None,
+    birthday_names: list[str] | None = None,
+    anniversary_names: list[str] | None = None,
+) -> list[tuple[str, Exception | None]]:
+    """Send the day's greetings, combining both batches into one email when possible.
+
+    When both batches have posters and the birthday/anniversary recipient
+    lists are identical, everything goes out as a single message — one DATA
+    transaction and half the Office365 quota consumption. Otherwise this
+    falls back to send_all (separate messages over one shared connection).
+    Returns the same [(event_type, error_or_None), ...] shape as send_all.
+    """
+    if today is None:
+        today = date.today()
+
+    bd_rcpt = recipients.get("birthday", {})
+    ann_rcpt = recipients.get("anniversary", {})
+    same_recipients = (
+        bd_rcpt.get("to", []) == ann_rcpt.get("to", [])
+        and bd_rcpt.get("cc", []) == ann_rcpt.get("cc", [])
+    )
+
+    if not (birthday_posters and anniversary_posters and same_recipients):
+        return send_all(birthday_posters, anniversary_posters, recipients,
+                        sender, password, today,
+                        birthday_names=birthday_names,
+                        anniversary_names=anniversary_names)
+
+    to = bd_rcpt.get("to", [])
+    cc = bd_rcpt.get("cc", [])
+    if not to:
+        logger.warning("Daily greetings email skipped — no TO recipients configured.")
+        return []
+
+    bd_names = birthday_names or []
+    ann_names = anniversary_names or []
+    subject = f"Birthday & Anniversary Greetings | {today.strftime('%d %B %Y')}"
+    body = (
+        f"Hi,\n\n"
+        f"Please find attached today's greeting posters "
+        f"({today.strftime('%d %B %Y')}).\n\n"
+    )
+    if bd_names:
+        body += "Birthdays today:\n" + "\n".join(f"  • {n}" for n in bd_names) + "\n\n"
+    if ann_names:
+        body += "Work anniversaries today:\n" + "\n".join(f"  • {n}" for n in ann_names) + "\n\n"
+    body += "Warm regards,\nAutoGreet"
+
+    try:
+        send_email(sender, password, to, cc, subject, body,
+                   birthday_posters + anniversary_posters)
+        return [("birthday", None), ("anniversary", None)]
+    except Exception as exc:
+        return [("birthday", exc), ("anniversary", exc)]
+
+
+def send_all(
+    birthday_posters: list[tuple[str, bytes]],
+    anniversary_posters: list[tuple[str, bytes]],
+    recipients: dict,
+    sender: str,
+    password: str,
+    today: date | None = None,
+    birthday_names: list[str] | None = None,
+    anniversary_names: list[str] | None = None,
+) -> list[tuple[str, Exception | None]]:
+    """Send both daily batches over a single SMTP connection.
+
+    recipients is the full config section ({"birthday": {...}, "anniversary":
+    {...}}). Returns [(event_type, error_or_None), ...] for the batches that
+    had posters, so callers can update the sent-log per batch.
+    """
+    results: list[tuple[str, Exception | None]] = []
+    with SMTPSession(sender, password) as session:
+        for event_type, send_fn, posters, names in (
+            ("birthday", send_birthday_emails, birthday_posters, birthday_names),
+            ("anniversary", send_anniversary_emails, anniversary_posters, anniversary_names),
+        ):
+            if not posters:
+                continue
+            try:
+                send_fn(posters, recipients.get(event_type, {}), sender, password,
+                        today, employee_names=names, session=session)
+                results.append((event_type, None))
+            except Exception as exc:
+                results.append((event_type, exc))
+    return results
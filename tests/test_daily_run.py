@@ -61,3 +61,37 @@ class TestWeekendCatchup:
         # Saturday on its own — only if cron runs on weekends
         dates = daily_run._dates_to_check(saturday)
         assert saturday in dates
+
+
+class TestQuickDateMatch:
+    """The raw-record prefilter must never produce false negatives."""
+
+    def test_day_first_formats(self):
+        d = date(2024, 3, 23)
+        assert daily_run._quick_date_match("23-03-1992", d)
+        assert daily_run._quick_date_match("23/03/1992", d)
+
+    def test_iso_and_month_first_formats(self):
+        d = date(2024, 3, 23)
+        assert daily_run._quick_date_match("1992-03-23", d)
+        assert daily_run._quick_date_match("03/23/1992", d)
+        assert daily_run._quick_date_match("1992/03/23", d)
+
+    def test_unpadded_components(self):
+        assert daily_run._quick_date_match("1-6-2019", date(2024, 6, 1))
+
+    def test_non_matching_date(self):
+        assert not daily_run._quick_date_match("23-03-1992", date(2024, 3, 24))
+
+    def test_empty_value(self):
+        assert not daily_run._quick_date_match("", date(2024, 3, 23))
+
+    def test_filter_keeps_dob_and_doj_matches(self, minimal_cfg):
+        d = date(2024, 3, 23)
+        raws = [
+            {"DateOfBirth": "23-03-1992"},
+            {"DateOfJoining": "2019-03-23"},
+            {"DateOfBirth": "01-01-1990"},
+        ]
+        kept = daily_run._filter_raw_candidates(raws, minimal_cfg["field_mapping"], [d])
+        assert kept == raws[:2]
@@ -3,7 +3,15 @@ import pytest
 from datetime import date
 from unittest.mock import patch, MagicMock
 
-from data_sources import parse_date, map_employee, fetch_sample_json, invalidate_cache
+from data_sources import (
+    parse_date,
+    map_employee,
+    map_employees_bulk,
+    iter_todays,
+    fetch_sample_json,
+    get_mapped_employees,
+    invalidate_cache,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -79,6 +87,49 @@ class TestMapEmployee:
         assert emp["_raw"] == raw
 
 
+# ---------------------------------------------------------------------------
+# map_employees_bulk
+# ---------------------------------------------------------------------------
+
+class TestMapEmployeesBulk:
+    def test_matches_per_row_mapping(self, minimal_cfg):
+        raws = [
+            {"EmployeeName": "Priya Sharma", "DateOfBirth": "23-03-1992"},
+            {"EmployeeName": "Bob", "DateOfJoining": "2019-06-01"},
+            {"EmployeeName": "NoDates"},
+        ]
+        bulk = map_employees_bulk(raws, minimal_cfg["field_mapping"])
+        per_row = [map_employee(r, minimal_cfg["field_mapping"]) for r in raws]
+        assert bulk == per_row
+
+    def test_empty_list(self, minimal_cfg):
+        assert map_employees_bulk([], minimal_cfg["field_mapping"]) == []
+
+
+# ---------------------------------------------------------------------------
+# iter_todays
+# ---------------------------------------------------------------------------
+
+class TestIterTodays:
+    def test_yields_matching_events(self, minimal_cfg):
+        raws = [
+            {"EmployeeName": "Bday", "DateOfBirth": "23-03-1992"},
+            {"EmployeeName": "Anniv", "DateOfJoining": "23-03-2019"},
+            {"EmployeeName": "Neither", "DateOfBirth": "01-01-1990"},
+        ]
+        events = list(iter_todays(raws, minimal_cfg["field_mapping"], date(2024, 3, 23)))
+        assert [(kind, emp["name"]) for kind, emp in events] == [
+            ("birthday", "Bday"),
+            ("anniversary", "Anniv"),
+        ]
+
+    def test_same_day_both_events_yields_twice(self, minimal_cfg):
+        raws = [{"EmployeeName": "Both", "DateOfBirth": "23-03-1992",
+                 "DateOfJoining": "23-03-2019"}]
+        events = list(iter_todays(raws, minimal_cfg["field_mapping"], date(2024, 3, 23)))
+        assert [kind for kind, _ in events] == ["birthday", "anniversary"]
+
+
 # ---------------------------------------------------------------------------
 # fetch_sample_json
 # ---------------------------------------------------------------------------
@@ -88,8 +139,9 @@ class TestFetchSampleJson:
         invalidate_cache()
         mock_resp = MagicMock()
         mock_resp.json.return_value = [{"id": 1}, {"id": 2}]
+        mock_resp.content = b'[{"id": 1}, {"id": 2}]'
         mock_resp.raise_for_status = MagicMock()
-        with patch("data_sources.requests.get", return_value=mock_resp) as mock_get:
+        with patch("data_sources._SESSION.get", return_value=mock_resp) as mock_get:
             result = fetch_sample_json("https://example.com/employees")
         assert result == [{"id": 1}, {"id": 2}]
         mock_get.assert_called_once()
@@ -98,8 +150,9 @@ class TestFetchSampleJson:
         invalidate_cache()
         mock_resp = MagicMock()
         mock_resp.json.return_value = {"id": 1, "name": "Solo"}
+        mock_resp.content = b'{"id": 1, "name": "Solo"}'
         mock_resp.raise_for_status = MagicMock()
-        with patch("data_sources.requests.get", return_value=mock_resp):
+        with patch("data_sources._SESSION.get", return_value=mock_resp):
             result = fetch_sample_json("https://example.com/single")
         assert result == [{"id": 1, "name": "Solo"}]
 
@@ -107,8 +160,9 @@ class TestFetchSampleJson:
         invalidate_cache()
         mock_resp = MagicMock()
         mock_resp.json.return_value = [{"id": 1}]
+        mock_resp.content = b'[{"id": 1}]'
         mock_resp.raise_for_status = MagicMock()
-        with patch("data_sources.requests.get", return_value=mock_resp) as mock_get:
+        with patch("data_sources._SESSION.get", return_value=mock_resp) as mock_get:
             fetch_sample_json("https://example.com/cached")
             fetch_sample_json("https://example.com/cached")
         assert mock_get.call_count == 1
@@ -117,8 +171,24 @@ class TestFetchSampleJson:
         invalidate_cache()
         mock_resp = MagicMock()
         mock_resp.json.return_value = []
+        mock_resp.content = b"[]"
         mock_resp.raise_for_status = MagicMock()
-        with patch("data_sources.requests.get", return_value=mock_resp) as mock_get:
+        with patch("data_sources._SESSION.get", return_value=mock_resp) as mock_get:
             fetch_sample_json("https://example.com/auth", auth_header={"Authorization": "Bearer token"})
         _, kwargs = mock_get.call_args
         assert kwargs["headers"]["Authorization"] == "Bearer token"
+
+
+# ---------------------------------------------------------------------------
+# get_mapped_employees
+# ---------------------------------------------------------------------------
+
+class TestGetMappedEmployees:
+    def test_fetches_and_maps(self, minimal_cfg):
+        invalidate_cache()
+        minimal_cfg["data_source"]["sample_url"] = "https://example.com/mapped"
+        raws = [{"EmployeeName": "Priya Sharma", "DateOfBirth": "23-03-1992"}]
+        with patch("data_sources.get_employees", return_value=raws):
+            employees = get_mapped_employees(minimal_cfg)
+        assert employees[0]["name"] == "Priya Sharma"
+        assert employees[0]["dob"] == date(1992, 3, 23)
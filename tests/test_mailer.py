@@ -3,7 +3,13 @@ import pytest
 from unittest.mock import patch, MagicMock, call
 from datetime import date
 
-from mailer import _names_summary, send_email, send_birthday_emails, send_anniversary_emails
+from mailer import (
+    _names_summary,
+    send_email,
+    send_birthday_emails,
+    send_anniversary_emails,
+    send_daily_greetings,
+)
 
 
 class TestNamesSummary:
@@ -34,7 +40,7 @@ class TestSendEmail:
 
     def test_sends_to_correct_recipients(self):
         smtp = self._make_smtp()
-        with patch("mailer.smtplib.SMTP", return_value=smtp):
+        with patch("mailer.smtplib.SMTP_SSL", return_value=smtp):
             send_email(
                 sender="sender@example.com",
                 password="pass",
@@ -44,16 +50,16 @@ class TestSendEmail:
                 body="Hello",
                 attachments=[],
             )
-        smtp.sendmail.assert_called_once()
-        _, recipients, _ = smtp.sendmail.call_args[0]
+        smtp.send_message.assert_called_once()
+        recipients = smtp.send_message.call_args[1]["to_addrs"]
         assert "a@example.com" in recipients
         assert "b@example.com" in recipients
 
     def test_retries_on_transient_failure(self):
         smtp = self._make_smtp()
         import smtplib
-        smtp.sendmail.side_effect = [smtplib.SMTPException("transient"), None]
-        with patch("mailer.smtplib.SMTP", return_value=smtp):
+        smtp.send_message.side_effect = [smtplib.SMTPException("transient"), None]
+        with patch("mailer.smtplib.SMTP_SSL", return_value=smtp):
             with patch("mailer.time.sleep"):  # speed up test
                 send_email(
                     sender="sender@example.com",
@@ -64,13 +70,13 @@ class TestSendEmail:
                     body="Hello",
                     attachments=[],
                 )
-        assert smtp.sendmail.call_count == 2
+        assert smtp.send_message.call_count == 2
 
     def test_raises_after_max_retries(self):
         smtp = self._make_smtp()
         import smtplib
-        smtp.sendmail.side_effect = smtplib.SMTPException("always fails")
-        with patch("mailer.smtplib.SMTP", return_value=smtp):
+        smtp.send_message.side_effect = smtplib.SMTPException("always fails")
+        with patch("mailer.smtplib.SMTP_SSL", return_value=smtp):
             with patch("mailer.time.sleep"):
                 with pytest.raises(smtplib.SMTPException):
                     send_email(
@@ -107,7 +113,7 @@ class TestSendBirthdayEmails:
                 date(2024, 3, 23),
                 employee_names=["Priya Sharma"],
             )
-        subject = mock_send.call_args[1]["subject"] if mock_send.call_args[1] else mock_send.call_args[0][4]
+        subject = mock_send.call_args[1].get("subject") or mock_send.call_args[0][4]
         assert "Priya Sharma" in subject
 
 
@@ -116,3 +122,43 @@ class TestSendAnniversaryEmails:
         with patch("mailer.send_email") as mock_send:
             send_anniversary_emails([], {"to": ["a@b.com"], "cc": []}, "s", "p", date(2024, 3, 23))
         mock_send.assert_not_called()
+
+
+class TestSendDailyGreetings:
+    _same = {
+        "birthday": {"to": ["mgr@co.com"], "cc": []},
+        "anniversary": {"to": ["mgr@co.com"], "cc": []},
+    }
+
+    def test_combines_batches_when_recipients_match(self):
+        with patch("mailer.send_email") as mock_send:
+            results = send_daily_greetings(
+                [("bd.png", b"b")], [("ann.png", b"a")], self._same,
+                "s", "p", date(2024, 3, 23),
+                birthday_names=["Priya Sharma"], anniversary_names=["Bob"],
+            )
+        mock_send.assert_called_once()
+        attachments = mock_send.call_args[0][6]
+        assert [fn for fn, _ in attachments] == ["bd.png", "ann.png"]
+        assert results == [("birthday", None), ("anniversary", None)]
+
+    def test_separate_sends_when_recipients_differ(self):
+        recipients = {
+            "birthday": {"to": ["mgr@co.com"], "cc": []},
+            "anniversary": {"to": ["hr@co.com"], "cc": []},
+        }
+        with patch("mailer.send_email") as mock_send:
+            results = send_daily_greetings(
+                [("bd.png", b"b")], [("ann.png", b"a")], recipients,
+                "s", "p", date(2024, 3, 23),
+            )
+        assert mock_send.call_count == 2
+        assert [et for et, _ in results] == ["birthday", "anniversary"]
+
+    def test_single_batch_falls_back(self):
+        with patch("mailer.send_email") as mock_send:
+            results = send_daily_greetings(
+                [("bd.png", b"b")], [], self._same, "s", "p", date(2024, 3, 23),
+            )
+        mock_send.assert_called_once()
+        assert results == [("birthday", None)]